@@ -1,11 +1,17 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_caching import Cache
 import os
-import json
+import time
 import uuid
 import logging
+import orjson
 from datetime import datetime
+from urllib.parse import unquote
 from werkzeug.utils import secure_filename
+from db import (ENUM_FIELDS, ENUM_KEY, init_db, get_db, list_records, list_records_page, get_record, list_projects_with_counts,
+                insert_record, insert_records, update_record, delete_record)
 
 # Configure logging
 logging.basicConfig(
@@ -18,48 +24,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider that uses orjson for jsonify() responses and request bodies"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, origins=['http://localhost:3000'], supports_credentials=True)
 
+# Short-lived cache for endpoints that return static or simulated payloads
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 10})
+
 # Configuration
 UPLOAD_FOLDER = 'data'
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'csv', 'json', 'xml', 'xls', 'xlsx', 'md'}
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB copy buffer for streamed uploads
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 logger.info(f"Upload directory created/verified: {UPLOAD_FOLDER}")
 
-# Data storage files
-PROJECTS_FILE = os.path.join(UPLOAD_FOLDER, 'projects.json')
-GOALS_FILE = os.path.join(UPLOAD_FOLDER, 'goals.json')
-INSIGHTS_FILE = os.path.join(UPLOAD_FOLDER, 'insights.json')
-FILES_FILE = os.path.join(UPLOAD_FOLDER, 'files.json')
+# Data storage (SQLite, see db.py)
+init_db(app)
 
-def load_json_data(filename):
-    """Load JSON data from file"""
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading {filename}: {e}")
-    return {}
-
-def save_json_data(filename, data):
-    """Save JSON data to file"""
-    try:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving {filename}: {e}")
-        return False
+def enum_field_error(data):
+    """Return an error message if an enum-like field (status, priority, ...) is not a string or null"""
+    if ENUM_KEY in data:
+        return f"'{ENUM_KEY}' is a reserved field"
+    for field in ENUM_FIELDS:
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return f'{field} must be a string'
+    return None
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    _, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
+
+@app.before_request
+def stamp_request_time():
+    """Take the request timestamp once so handlers share it"""
+    g.now_iso = datetime.now().isoformat()
 
 @app.route('/health', methods=['GET'])
+@cache.cached(timeout=60)
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'message': 'CALEX Backend is running'})
@@ -69,23 +82,18 @@ def health_check():
 def get_projects():
     """Get all projects"""
     try:
-        projects = load_json_data(PROJECTS_FILE)
-        projects_list = list(projects.values()) if projects else []
-        
-        # Calculate counts for each project
-        goals = load_json_data(GOALS_FILE)
-        insights = load_json_data(INSIGHTS_FILE)
-        files = load_json_data(FILES_FILE)
-        
-        for project in projects_list:
-            project_id = project['id']
-            project['documents_count'] = len([f for f in files.values() if f.get('project_id') == project_id])
-            project['goals_count'] = len([g for g in goals.values() if g.get('project_id') == project_id])
-            project['insights_count'] = len([i for i in insights.values() if i.get('project_id') == project_id])
+        projects_list = []
+        
+        # Counts for each project are aggregated by the same query
+        for project, files_count, goals_count, insights_count in list_projects_with_counts():
+            project['documents_count'] = files_count
+            project['goals_count'] = goals_count
+            project['insights_count'] = insights_count
             project['research_progress'] = project.get('research_progress', 0)
+            projects_list.append(project)
         
         logger.info(f"Returning {len(projects_list)} projects")
-        return jsonify({'projects': projects_list})
+        return jsonify({'projects': projects_list, 'total': len(projects_list)})
     except Exception as e:
         logger.error(f"Error getting projects: {e}")
         return jsonify({'error': 'Failed to get projects'}), 500
@@ -103,7 +111,6 @@ def create_project():
         if not name:
             return jsonify({'error': 'Project name is required'}), 400
         
-        projects = load_json_data(PROJECTS_FILE)
         project_id = str(uuid.uuid4())
         
         project = {
@@ -111,16 +118,16 @@ def create_project():
             'name': name,
             'description': description,
             'status': 'setup',
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
+            'created_at': g.now_iso,
+            'updated_at': g.now_iso,
             'documents_count': 0,
             'goals_count': 0,
             'insights_count': 0,
             'research_progress': 0
         }
         
-        projects[project_id] = project
-        save_json_data(PROJECTS_FILE, projects)
+        with get_db():
+            insert_record('projects', project)
         
         logger.info(f"Created project: {name} ({project_id})")
         return jsonify({'project': project}), 201
@@ -133,16 +140,16 @@ def create_project():
 def start_research(project_id):
     """Start research for a project"""
     try:
-        projects = load_json_data(PROJECTS_FILE)
-        if project_id not in projects:
+        project = get_record('projects', project_id)
+        if project is None:
             return jsonify({'error': 'Project not found'}), 404
         
-        project = projects[project_id]
         project['status'] = 'researching'
-        project['updated_at'] = datetime.now().isoformat()
+        project['updated_at'] = g.now_iso
         project['research_progress'] = 0
         
-        save_json_data(PROJECTS_FILE, projects)
+        with get_db():
+            update_record('projects', project)
         
         logger.info(f"Started research for project: {project['name']}")
         return jsonify({'message': 'Research started successfully'})
@@ -152,49 +159,65 @@ def start_research(project_id):
         return jsonify({'error': 'Failed to start research'}), 500
 
 # File Upload Endpoints
-@app.route('/api/upload', methods=['POST'])
+@app.route('/api/upload', methods=['PUT'])
 def upload_file():
-    """Upload a file"""
+    """Upload a file sent as the raw request body"""
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
+        # Filename comes URL-encoded in a header since there is no multipart part to carry it
+        original_name = unquote(request.headers.get('X-Filename', ''))
+        project_id = request.args.get('project_id')
+        chunked = request.headers.get('Transfer-Encoding', '').lower() == 'chunked'
         
-        file = request.files['file']
-        project_id = request.form.get('project_id')
+        if not request.content_length and not chunked:
+            return jsonify({'error': 'No file provided'}), 400
         
         if not project_id:
             return jsonify({'error': 'Project ID is required'}), 400
         
-        if file.filename == '':
+        if original_name == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not allowed_file(file.filename):
+        if not allowed_file(original_name):
             return jsonify({'error': 'File type not allowed'}), 400
         
-        filename = secure_filename(file.filename)
+        filename = secure_filename(original_name)
         file_id = str(uuid.uuid4())
-        file_extension = filename.rsplit('.', 1)[1].lower()
+        file_extension = filename.rpartition('.')[2].lower()
         
-        # Save file
+        # Stream file to disk, then save its metadata; a failure in either removes the file
         file_path = os.path.join(UPLOAD_FOLDER, f"{file_id}_{filename}")
-        file.save(file_path)
-        
-        # Save file metadata
-        files = load_json_data(FILES_FILE)
-        file_data = {
-            'id': file_id,
-            'filename': filename,
-            'original_name': file.filename,
-            'size': os.path.getsize(file_path),
-            'type': file.content_type or f'application/{file_extension}',
-            'project_id': project_id,
-            'upload_date': datetime.now().isoformat(),
-            'status': 'completed',
-            'path': file_path
-        }
-        
-        files[file_id] = file_data
-        save_json_data(FILES_FILE, files)
+        size = 0
+        try:
+            with open(file_path, 'wb') as out:
+                while True:
+                    chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    size += len(chunk)
+            
+            if size == 0:
+                os.remove(file_path)
+                return jsonify({'error': 'No file provided'}), 400
+            
+            file_data = {
+                'id': file_id,
+                'filename': filename,
+                'original_name': original_name,
+                'size': size,
+                'type': request.mimetype or f'application/{file_extension}',
+                'project_id': project_id,
+                'upload_date': g.now_iso,
+                'status': 'completed',
+                'path': file_path
+            }
+            
+            with get_db():
+                insert_record('files', file_data)
+        except Exception:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
         
         logger.info(f"Uploaded file: {filename} for project {project_id}")
         return jsonify({'file': file_data})
@@ -205,11 +228,20 @@ def upload_file():
 
 @app.route('/api/files', methods=['GET'])
 def list_files():
-    """List all files"""
+    """List files, optionally filtered with ?project_id= and paginated with ?limit=&offset="""
     try:
-        files = load_json_data(FILES_FILE)
-        files_list = list(files.values()) if files else []
-        return jsonify({'files': files_list})
+        try:
+            limit = int(request.args.get('limit', -1))
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+        
+        if limit < -1:
+            return jsonify({'error': 'limit must be -1 (no limit) or a non-negative integer'}), 400
+        if offset < 0:
+            return jsonify({'error': 'offset must be a non-negative integer'}), 400
+        files_list, total = list_records_page('files', request.args.get('project_id'), limit, offset)
+        return jsonify({'files': files_list, 'total': total})
     except Exception as e:
         logger.error(f"Error listing files: {e}")
         return jsonify({'error': 'Failed to list files'}), 500
@@ -218,11 +250,10 @@ def list_files():
 def delete_file(file_id):
     """Delete a file"""
     try:
-        files = load_json_data(FILES_FILE)
-        if file_id not in files:
+        file_data = get_record('files', file_id)
+        if file_data is None:
             return jsonify({'error': 'File not found'}), 404
         
-        file_data = files[file_id]
         file_path = file_data.get('path')
         
         # Delete physical file
@@ -230,8 +261,8 @@ def delete_file(file_id):
             os.remove(file_path)
         
         # Remove from metadata
-        del files[file_id]
-        save_json_data(FILES_FILE, files)
+        with get_db():
+            delete_record('files', file_id)
         
         logger.info(f"Deleted file: {file_data['filename']}")
         return jsonify({'message': 'File deleted successfully'})
@@ -245,8 +276,7 @@ def delete_file(file_id):
 def get_project_goals(project_id):
     """Get goals for a project"""
     try:
-        goals = load_json_data(GOALS_FILE)
-        project_goals = [g for g in goals.values() if g.get('project_id') == project_id]
+        project_goals = list_records('goals', project_id)
         return jsonify({'goals': project_goals})
     except Exception as e:
         logger.error(f"Error getting goals: {e}")
@@ -264,7 +294,10 @@ def create_goal(project_id):
         if not title:
             return jsonify({'error': 'Goal title is required'}), 400
         
-        goals = load_json_data(GOALS_FILE)
+        error = enum_field_error({'priority': priority})
+        if error:
+            return jsonify({'error': f'Goal {error}'}), 400
+        
         goal_id = str(uuid.uuid4())
         
         goal = {
@@ -274,13 +307,13 @@ def create_goal(project_id):
             'priority': priority,
             'status': 'active',
             'project_id': project_id,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
+            'created_at': g.now_iso,
+            'updated_at': g.now_iso,
             'progress': 0
         }
         
-        goals[goal_id] = goal
-        save_json_data(GOALS_FILE, goals)
+        with get_db():
+            insert_record('goals', goal)
         
         logger.info(f"Created goal: {title} for project {project_id}")
         return jsonify({'goal': goal}), 201
@@ -294,16 +327,21 @@ def update_goal(goal_id):
     """Update a goal"""
     try:
         data = request.get_json()
-        goals = load_json_data(GOALS_FILE)
+        goal = get_record('goals', goal_id)
         
-        if goal_id not in goals:
+        if goal is None:
             return jsonify({'error': 'Goal not found'}), 404
         
-        goal = goals[goal_id]
+        error = enum_field_error(data)
+        if error:
+            return jsonify({'error': f'Goal {error}'}), 400
+        
         goal.update(data)
-        goal['updated_at'] = datetime.now().isoformat()
+        goal['id'] = goal_id
+        goal['updated_at'] = g.now_iso
         
-        save_json_data(GOALS_FILE, goals)
+        with get_db():
+            update_record('goals', goal)
         
         logger.info(f"Updated goal: {goal['title']}")
         return jsonify({'goal': goal})
@@ -316,14 +354,13 @@ def update_goal(goal_id):
 def delete_goal(goal_id):
     """Delete a goal"""
     try:
-        goals = load_json_data(GOALS_FILE)
+        goal = get_record('goals', goal_id)
         
-        if goal_id not in goals:
+        if goal is None:
             return jsonify({'error': 'Goal not found'}), 404
         
-        goal = goals[goal_id]
-        del goals[goal_id]
-        save_json_data(GOALS_FILE, goals)
+        with get_db():
+            delete_record('goals', goal_id)
         
         logger.info(f"Deleted goal: {goal['title']}")
         return jsonify({'message': 'Goal deleted successfully'})
@@ -337,8 +374,7 @@ def delete_goal(goal_id):
 def get_project_insights(project_id):
     """Get insights for a project"""
     try:
-        insights = load_json_data(INSIGHTS_FILE)
-        project_insights = [i for i in insights.values() if i.get('project_id') == project_id]
+        project_insights = list_records('insights', project_id)
         return jsonify({'insights': project_insights})
     except Exception as e:
         logger.error(f"Error getting insights: {e}")
@@ -349,8 +385,6 @@ def generate_insights(project_id):
     """Generate insights for a project"""
     try:
         # Simulate insight generation
-        insights = load_json_data(INSIGHTS_FILE)
-        
         # Generate sample insights
         sample_insights = [
             {
@@ -361,7 +395,7 @@ def generate_insights(project_id):
                 'relevance_score': 0.92,
                 'tags': ['market analysis', 'consumer behavior', 'trends'],
                 'project_id': project_id,
-                'created_at': datetime.now().isoformat()
+                'created_at': g.now_iso
             },
             {
                 'id': str(uuid.uuid4()),
@@ -371,7 +405,7 @@ def generate_insights(project_id):
                 'relevance_score': 0.88,
                 'tags': ['strategy', 'risk management', 'implementation'],
                 'project_id': project_id,
-                'created_at': datetime.now().isoformat()
+                'created_at': g.now_iso
             },
             {
                 'id': str(uuid.uuid4()),
@@ -381,21 +415,20 @@ def generate_insights(project_id):
                 'relevance_score': 0.75,
                 'tags': ['investigation', 'patterns', 'analysis'],
                 'project_id': project_id,
-                'created_at': datetime.now().isoformat()
+                'created_at': g.now_iso
             }
         ]
         
-        for insight in sample_insights:
-            insights[insight['id']] = insight
-        
-        save_json_data(INSIGHTS_FILE, insights)
-        
-        # Update project progress
-        projects = load_json_data(PROJECTS_FILE)
-        if project_id in projects:
-            projects[project_id]['research_progress'] = min(100, projects[project_id].get('research_progress', 0) + 25)
-            projects[project_id]['updated_at'] = datetime.now().isoformat()
-            save_json_data(PROJECTS_FILE, projects)
+        # Store the insights and update project progress in a single transaction.
+        # The project is read after the insert so the write lock is already held.
+        with get_db():
+            insert_records('insights', sample_insights)
+            
+            project = get_record('projects', project_id)
+            if project is not None:
+                project['research_progress'] = min(100, project.get('research_progress', 0) + 25)
+                project['updated_at'] = g.now_iso
+                update_record('projects', project)
         
         logger.info(f"Generated insights for project: {project_id}")
         return jsonify({'message': 'Insights generated successfully'})
@@ -422,74 +455,188 @@ def submit_feedback(insight_id):
         logger.error(f"Error submitting feedback: {e}")
         return jsonify({'error': 'Failed to submit feedback'}), 500
 
-# Research Progress Endpoints
-@app.route('/api/research/project/<project_id>/live-updates', methods=['GET'])
-def get_live_research_updates(project_id):
-    """Get live research updates for a project"""
-    try:
-        # Simulate live research updates
-        updates = [
-            {
-                'id': str(uuid.uuid4()),
-                'type': 'web_search',
-                'content': 'Searching for recent dark matter research papers on arXiv...',
-                'timestamp': datetime.now().isoformat(),
-                'status': 'completed',
-                'details': {
-                    'query': 'dark matter research papers 2024',
-                    'sources_found': 12,
-                    'relevant_papers': 8
-                }
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'type': 'analysis',
-                'content': 'Analyzing document structure and extracting key concepts...',
-                'timestamp': datetime.now().isoformat(),
-                'status': 'in_progress',
-                'details': {
-                    'documents_processed': 3,
-                    'concepts_extracted': 45,
-                    'relationships_found': 23
-                }
-            },
+# Simulated research payloads (demo data, built once at import)
+LIVE_UPDATES_TEMPLATE = [
+    {
+        'id': 'update-001',
+        'type': 'web_search',
+        'content': 'Searching for recent dark matter research papers on arXiv...',
+        'status': 'completed',
+        'details': {
+            'query': 'dark matter research papers 2024',
+            'sources_found': 12,
+            'relevant_papers': 8
+        }
+    },
+    {
+        'id': 'update-002',
+        'type': 'analysis',
+        'content': 'Analyzing document structure and extracting key concepts...',
+        'status': 'in_progress',
+        'details': {
+            'documents_processed': 3,
+            'concepts_extracted': 45,
+            'relationships_found': 23
+        }
+    },
+    {
+        'id': 'update-003',
+        'type': 'reasoning',
+        'content': 'Identifying patterns in dark matter distribution models...',
+        'status': 'in_progress',
+        'details': {
+            'hypothesis': 'Dark matter clustering shows fractal-like patterns',
+            'confidence': 0.78,
+            'supporting_evidence': 5
+        }
+    },
+    {
+        'id': 'update-004',
+        'type': 'web_search',
+        'content': 'Fetching latest experimental data from CERN...',
+        'status': 'completed',
+        'details': {
+            'query': 'CERN dark matter experiments 2024',
+            'data_sources': ['ATLAS', 'CMS', 'LHCb'],
+            'new_findings': 3
+        }
+    },
+    {
+        'id': 'update-005',
+        'type': 'insight_generation',
+        'content': 'Generating insights based on cross-referenced data...',
+        'status': 'in_progress',
+        'details': {
+            'insights_generated': 2,
+            'confidence_scores': [0.85, 0.72],
+            'next_steps': ['Validate with additional datasets', 'Compare with theoretical models']
+        }
+    }
+]
+
+ADVANCED_RESEARCH_TEMPLATE = {
+    'main_thread': {
+        'id': 'main-001',
+        'status': 'active',
+        'focus': 'Self-healing polymer composites for space applications',
+        'progress': 65,
+        'updates': [
             {
-                'id': str(uuid.uuid4()),
-                'type': 'reasoning',
-                'content': 'Identifying patterns in dark matter distribution models...',
-                'timestamp': datetime.now().isoformat(),
-                'status': 'in_progress',
+                'id': 'update-001',
+                'timestamp': '0:00',
+                'type': 'analysis_start',
+                'content': 'Analyzing uploaded documents: 3 NASA whitepapers, 2 academic PDFs, 1 video lecture transcript.',
+                'ai_message': True,
                 'details': {
-                    'hypothesis': 'Dark matter clustering shows fractal-like patterns',
-                    'confidence': 0.78,
-                    'supporting_evidence': 5
+                    'documents_analyzed': 6,
+                    'key_topics': ['self-healing materials', 'space applications', 'polymer composites']
                 }
             },
             {
-                'id': str(uuid.uuid4()),
-                'type': 'web_search',
-                'content': 'Fetching latest experimental data from CERN...',
-                'timestamp': datetime.now().isoformat(),
-                'status': 'completed',
+                'id': 'update-002',
+                'timestamp': '0:03',
+                'type': 'insight',
+                'content': 'Self-healing polymer composites show micro-crack repair under vacuum. Most recent success: ESA 2024 test on ISS.',
+                'ai_message': True,
+                'confidence': 0.92,
+                'references': ['ESA_2024_ISS_Report.pdf'],
                 'details': {
-                    'query': 'CERN dark matter experiments 2024',
-                    'data_sources': ['ATLAS', 'CMS', 'LHCb'],
-                    'new_findings': 3
+                    'key_limitations': ['slow healing at low temperatures'],
+                    'success_rate': '78%',
+                    'temperature_range': '-40°C to +60°C'
                 }
             },
             {
-                'id': str(uuid.uuid4()),
-                'type': 'insight_generation',
-                'content': 'Generating insights based on cross-referenced data...',
-                'timestamp': datetime.now().isoformat(),
-                'status': 'in_progress',
-                'details': {
-                    'insights_generated': 2,
-                    'confidence_scores': [0.85, 0.72],
-                    'next_steps': ['Validate with additional datasets', 'Compare with theoretical models']
-                }
+                'id': 'update-003',
+                'timestamp': '0:09',
+                'type': 'discovery',
+                'content': 'Detected missing data: No current solution for micrometeorite punctures in rigid modules.',
+                'ai_message': True,
+                'requires_action': True,
+                'suggestions': [
+                    {'action': 'pivot', 'label': 'Pivot to rapid-response materials', 'confidence': 0.85},
+                    {'action': 'continue', 'label': 'Keep original focus', 'confidence': 0.60},
+                    {'action': 'discuss', 'label': 'Discuss options', 'confidence': 0.75}
+                ]
             }
         ]
+    },
+    'branch_threads': [
+        {
+            'id': 'branch-001',
+            'parent_id': 'main-001',
+            'status': 'active',
+            'focus': 'Smart foams for impact absorption',
+            'progress': 40,
+            'trigger': 'User selected pivot to rapid-response materials',
+            'updates': [
+                {
+                    'id': 'update-004',
+                    'timestamp': '0:16',
+                    'type': 'branch_created',
+                    'content': 'Launching sub-research group: Smart foams for impact absorption',
+                    'ai_message': True,
+                    'details': {
+                        'documents_to_analyze': 4,
+                        'external_sources': ['SpaceX blog posts', 'MIT research database'],
+                        'estimated_completion': '15 minutes'
+                    }
+                },
+                {
+                    'id': 'update-005',
+                    'timestamp': '0:22',
+                    'type': 'live_update',
+                    'content': 'Smart foam prototypes (MIT, 2023) demonstrated 40% faster sealing than traditional layers.',
+                    'ai_message': True,
+                    'details': {
+                        'researchers_identified': ['Dr. Sarah Chen', 'Prof. Michael Rodriguez'],
+                        'suggested_action': 'outreach',
+                        'contact_info_available': True
+                    }
+                }
+            ]
+        }
+    ],
+    'completed_threads': [],
+    'pending_actions': [
+        {
+            'id': 'action-001',
+            'type': 'user_decision',
+            'content': 'Choose research direction for micrometeorite protection',
+            'options': ['pivot', 'continue', 'discuss'],
+            'deadline': None,
+            'priority': 'high'
+        }
+    ]
+}
+
+STREAM_UPDATES_TEMPLATE = [
+    {
+        'type': 'analysis',
+        'content': 'Processing document 4 of 6: "Advanced Materials for Space Applications"',
+        'progress': 67
+    },
+    {
+        'type': 'web_search',
+        'content': 'Found 3 new research papers on smart materials from 2024',
+        'progress': 75
+    },
+    {
+        'type': 'insight',
+        'content': 'Cross-referencing reveals potential for hybrid self-healing/impact materials',
+        'progress': 82
+    }
+]
+STREAM_UPDATE_INTERVAL = 0.3  # seconds between simulated streamed updates
+
+# Research Progress Endpoints
+@app.route('/api/research/project/<project_id>/live-updates', methods=['GET'])
+@cache.cached(timeout=5, query_string=False)
+def get_live_research_updates(project_id):
+    """Get live research updates for a project"""
+    try:
+        # Simulated updates, stamped with the request time
+        updates = [{**update, 'timestamp': g.now_iso} for update in LIVE_UPDATES_TEMPLATE]
         
         return jsonify({'updates': updates})
         
@@ -502,17 +649,17 @@ def start_live_research(project_id):
     """Start live research with real-time updates"""
     try:
         # Update project status
-        projects = load_json_data(PROJECTS_FILE)
-        if project_id not in projects:
+        project = get_record('projects', project_id)
+        if project is None:
             return jsonify({'error': 'Project not found'}), 404
         
-        project = projects[project_id]
         project['status'] = 'researching'
-        project['updated_at'] = datetime.now().isoformat()
+        project['updated_at'] = g.now_iso
         project['research_progress'] = 0
         project['live_research_started'] = True
         
-        save_json_data(PROJECTS_FILE, projects)
+        with get_db():
+            update_record('projects', project)
         
         logger.info(f"Started live research for project: {project['name']}")
         return jsonify({'message': 'Live research started successfully'})
@@ -523,106 +670,15 @@ def start_live_research(project_id):
 
 # Advanced Research Endpoints
 @app.route('/api/research/project/<project_id>/advanced-live', methods=['GET'])
+@cache.cached(timeout=5, query_string=False)
 def get_advanced_live_research(project_id):
     """Get advanced live research with branching threads and AI interactions"""
     try:
-        # Simulate advanced research with branching threads
+        # Simulated research threads, stamped with the request time
         research_data = {
-            'main_thread': {
-                'id': 'main-001',
-                'status': 'active',
-                'focus': 'Self-healing polymer composites for space applications',
-                'progress': 65,
-                'start_time': datetime.now().isoformat(),
-                'updates': [
-                    {
-                        'id': str(uuid.uuid4()),
-                        'timestamp': '0:00',
-                        'type': 'analysis_start',
-                        'content': 'Analyzing uploaded documents: 3 NASA whitepapers, 2 academic PDFs, 1 video lecture transcript.',
-                        'ai_message': True,
-                        'details': {
-                            'documents_analyzed': 6,
-                            'key_topics': ['self-healing materials', 'space applications', 'polymer composites']
-                        }
-                    },
-                    {
-                        'id': str(uuid.uuid4()),
-                        'timestamp': '0:03',
-                        'type': 'insight',
-                        'content': 'Self-healing polymer composites show micro-crack repair under vacuum. Most recent success: ESA 2024 test on ISS.',
-                        'ai_message': True,
-                        'confidence': 0.92,
-                        'references': ['ESA_2024_ISS_Report.pdf'],
-                        'details': {
-                            'key_limitations': ['slow healing at low temperatures'],
-                            'success_rate': '78%',
-                            'temperature_range': '-40°C to +60°C'
-                        }
-                    },
-                    {
-                        'id': str(uuid.uuid4()),
-                        'timestamp': '0:09',
-                        'type': 'discovery',
-                        'content': 'Detected missing data: No current solution for micrometeorite punctures in rigid modules.',
-                        'ai_message': True,
-                        'requires_action': True,
-                        'suggestions': [
-                            {'action': 'pivot', 'label': 'Pivot to rapid-response materials', 'confidence': 0.85},
-                            {'action': 'continue', 'label': 'Keep original focus', 'confidence': 0.60},
-                            {'action': 'discuss', 'label': 'Discuss options', 'confidence': 0.75}
-                        ]
-                    }
-                ]
-            },
-            'branch_threads': [
-                {
-                    'id': 'branch-001',
-                    'parent_id': 'main-001',
-                    'status': 'active',
-                    'focus': 'Smart foams for impact absorption',
-                    'progress': 40,
-                    'start_time': datetime.now().isoformat(),
-                    'trigger': 'User selected pivot to rapid-response materials',
-                    'updates': [
-                        {
-                            'id': str(uuid.uuid4()),
-                            'timestamp': '0:16',
-                            'type': 'branch_created',
-                            'content': 'Launching sub-research group: Smart foams for impact absorption',
-                            'ai_message': True,
-                            'details': {
-                                'documents_to_analyze': 4,
-                                'external_sources': ['SpaceX blog posts', 'MIT research database'],
-                                'estimated_completion': '15 minutes'
-                            }
-                        },
-                        {
-                            'id': str(uuid.uuid4()),
-                            'timestamp': '0:22',
-                            'type': 'live_update',
-                            'content': 'Smart foam prototypes (MIT, 2023) demonstrated 40% faster sealing than traditional layers.',
-                            'ai_message': True,
-                            'details': {
-                                'researchers_identified': ['Dr. Sarah Chen', 'Prof. Michael Rodriguez'],
-                                'suggested_action': 'outreach',
-                                'contact_info_available': True
-                            }
-                        }
-                    ]
-                }
-            ],
-            'completed_threads': [],
-            'pending_actions': [
-                {
-                    'id': str(uuid.uuid4()),
-                    'type': 'user_decision',
-                    'content': 'Choose research direction for micrometeorite protection',
-                    'options': ['pivot', 'continue', 'discuss'],
-                    'deadline': None,
-                    'priority': 'high'
-                }
-            ]
+            **ADVANCED_RESEARCH_TEMPLATE,
+            'main_thread': {**ADVANCED_RESEARCH_TEMPLATE['main_thread'], 'start_time': g.now_iso},
+            'branch_threads': [{**thread, 'start_time': g.now_iso} for thread in ADVANCED_RESEARCH_TEMPLATE['branch_threads']]
         }
         
         return jsonify(research_data)
@@ -668,31 +724,15 @@ def handle_research_action(project_id):
 
 @app.route('/api/research/project/<project_id>/stream', methods=['GET'])
 def stream_research_updates(project_id):
-    """Stream real-time research updates (simulated)"""
+    """Stream real-time research updates (simulated) as newline-delimited JSON"""
     try:
-        # Simulate streaming updates
-        updates = [
-            {
-                'timestamp': datetime.now().strftime('%M:%S'),
-                'type': 'analysis',
-                'content': 'Processing document 4 of 6: "Advanced Materials for Space Applications"',
-                'progress': 67
-            },
-            {
-                'timestamp': datetime.now().strftime('%M:%S'),
-                'type': 'web_search',
-                'content': 'Found 3 new research papers on smart materials from 2024',
-                'progress': 75
-            },
-            {
-                'timestamp': datetime.now().strftime('%M:%S'),
-                'type': 'insight',
-                'content': 'Cross-referencing reveals potential for hybrid self-healing/impact materials',
-                'progress': 82
-            }
-        ]
+        def generate():
+            for i, update in enumerate(STREAM_UPDATES_TEMPLATE):
+                if i:
+                    time.sleep(STREAM_UPDATE_INTERVAL)
+                yield orjson.dumps({**update, 'timestamp': datetime.now().strftime('%M:%S')}) + b'\n'
         
-        return jsonify({'updates': updates})
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
         
     except Exception as e:
         logger.error(f"Error streaming updates: {e}")
@@ -706,8 +746,8 @@ if __name__ == '__main__':
     print("  GET  /api/projects - List projects")
     print("  POST /api/projects - Create project")
     print("  POST /api/projects/<id>/start-research - Start research")
-    print("  POST /api/upload - Upload file")
-    print("  GET  /api/files - List files")
+    print("  PUT  /api/upload?project_id=<id> - Upload file (raw body, X-Filename header)")
+    print("  GET  /api/files[?project_id=<id>&limit=<n>&offset=<n>] - List files")
     print("  DELETE /api/files/<id> - Delete file")
     print("  GET  /api/goals/project/<id> - Get project goals")
     print("  POST /api/goals/project/<id> - Create goal")
@@ -717,9 +757,13 @@ if __name__ == '__main__':
     print("  POST /api/research/project/<id>/start-live - Start live research")
     print("  GET  /api/research/project/<id>/advanced-live - Get advanced live research")
     print("  POST /api/research/project/<id>/action - Handle research action")
-    print("  GET  /api/research/project/<id>/stream - Stream research updates")
+    print("  GET  /api/research/project/<id>/stream - Stream research updates (NDJSON)")
     print("Server starting on http://localhost:5000")
     print("Logs will be saved to calex_backend.log")
+    print("For production, run with gunicorn instead: gunicorn app:app")
+    
+    # Debug mode (reloader + debugger) only for development
+    debug = os.environ.get('FLASK_ENV') == 'development'
     
     logger.info("CALEX Flask Backend starting up")
-    app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=debug)
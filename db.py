@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DATA_FOLDER = 'data'
+DATABASE_FILE = os.path.join(DATA_FOLDER, 'calex.db')
+WAL_SIZE_LIMIT = 64 * 1024 * 1024  # bytes the WAL is truncated back to after a checkpoint
+CACHE_SIZE_KIB = 64 * 1024  # per-connection page cache, filled lazily
+MMAP_SIZE = 256 * 1024 * 1024  # database bytes read through a memory map shared by all workers
+CHECKPOINT_INTERVAL = 5  # seconds between background WAL checkpoints
+
+# Tables whose rows belong to a project and are looked up by project_id
+PROJECT_SCOPED_TABLES = ('goals', 'insights', 'files')
+ALL_TABLES = ('projects',) + PROJECT_SCOPED_TABLES
+
+# SQLite 3.45+ can store payloads as JSONB, a pre-parsed binary form that JSON
+# functions read without re-tokenizing the text. Older builds keep plain JSON text.
+JSONB_SUPPORTED = sqlite3.sqlite_version_info >= (3, 45, 0)
+DATA_PARAM = 'jsonb(?)' if JSONB_SUPPORTED else 'json(?)'
+
+# Enum-like fields are stored as small int codes instead of repeating the string
+# in every payload. Codes are persisted: only append new values, never reorder.
+ENUM_FIELDS = {
+    'status': ('active', 'setup', 'researching', 'completed'),
+    'priority': ('low', 'medium', 'high'),
+    'insight_type': ('finding', 'recommendation', 'question'),
+}
+_ENUM_CODES = {field: {value: code for code, value in enumerate(values)} for field, values in ENUM_FIELDS.items()}
+# Encoded fields are moved under this key, e.g. {"$enum": {"status": 0}}, so a plain int a
+# client stored in one of these fields is never mistaken for a code. Records may not use it.
+ENUM_KEY = '$enum'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS goals (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_goals_project ON goals(project_id);
+CREATE TABLE IF NOT EXISTS insights (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_insights_project ON insights(project_id);
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_project ON files(project_id);
+"""
+
+# One connection per worker thread, reused across requests so SQLite's page
+# cache stays warm. SQLite revalidates the cache against the file change
+# counter at the start of each read, so writes from other workers are seen.
+_local = threading.local()
+
+# With synchronous=NORMAL a WAL commit does not fsync; only checkpoints do. Request
+# connections disable auto-checkpointing and a background thread per worker process
+# checkpoints instead, so the fsync never runs on the request path.
+_checkpointer_lock = threading.Lock()
+_checkpointer_pid = None
+
+def connect():
+    """Open a new connection to the database"""
+    conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA journal_size_limit={WAL_SIZE_LIMIT}')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KIB}')
+    conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+    conn.execute('PRAGMA wal_autocheckpoint=0')
+    return conn
+
+def _checkpoint_loop():
+    conn = connect()
+    while True:
+        time.sleep(CHECKPOINT_INTERVAL)
+        try:
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        except sqlite3.Error as e:
+            logger.error(f"Error checkpointing database: {e}")
+
+def _ensure_checkpointer():
+    """Start the checkpoint thread in this process (threads do not survive a fork)"""
+    global _checkpointer_pid
+    with _checkpointer_lock:
+        if _checkpointer_pid != os.getpid():
+            threading.Thread(target=_checkpoint_loop, name='db-checkpointer', daemon=True).start()
+            _checkpointer_pid = os.getpid()
+
+def get_db():
+    """Get this thread's database connection, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        _ensure_checkpointer()
+        conn = _local.conn = connect()
+    return conn
+
+def release_db(exc=None):
+    """Roll back anything a failed request left uncommitted on this thread's connection"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+def _load_legacy_json(filename):
+    """Load JSON data from a legacy store file"""
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'rb') as f:
+                return orjson.loads(f.read())
+        except Exception as e:
+            logger.error(f"Error loading {filename}: {e}")
+    return {}
+
+def _migrate_legacy_json(conn, table):
+    """Import a legacy <table>.json store into the database, then move it aside"""
+    filename = os.path.join(DATA_FOLDER, f'{table}.json')
+    records = _load_legacy_json(filename)
+    if not records:
+        return
+
+    with conn:
+        for record in records.values():
+            try:
+                params = _row_params(table, record)
+            except ValueError as e:
+                logger.error(f"Skipping record {record.get('id')} from {filename}: {e}")
+                continue
+            conn.execute(f"INSERT OR IGNORE INTO {table} {_columns(table)} VALUES {_placeholders(table)}", params)
+
+    try:
+        os.replace(filename, f'{filename}.migrated')
+    except OSError:
+        # Another worker already moved it aside
+        pass
+    logger.info(f"Migrated {len(records)} records from {filename}")
+
+def _convert_to_jsonb(conn, table):
+    """Rewrite rows still stored as JSON text into JSONB"""
+    with conn:
+        cursor = conn.execute(f"UPDATE {table} SET data = jsonb(data) WHERE typeof(data) = 'text'")
+    if cursor.rowcount:
+        logger.info(f"Converted {cursor.rowcount} {table} rows to JSONB")
+
+def init_db(app):
+    """Create the schema, enable WAL mode and register the teardown hook"""
+    os.makedirs(DATA_FOLDER, exist_ok=True)
+    conn = connect()
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Fold whatever the previous run left in the write-ahead log into the database
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.executescript(SCHEMA)
+        for table in ALL_TABLES:
+            _migrate_legacy_json(conn, table)
+            if JSONB_SUPPORTED:
+                _convert_to_jsonb(conn, table)
+    finally:
+        conn.close()
+
+    app.teardown_appcontext(release_db)
+    logger.info(f"Database initialized: {DATABASE_FILE}")
+
+def _encode_enums(record):
+    if ENUM_KEY in record:
+        raise ValueError(f"'{ENUM_KEY}' is a reserved key")
+    codes = {}
+    for field, field_codes in _ENUM_CODES.items():
+        value = record.get(field)
+        code = field_codes.get(value) if isinstance(value, str) else None
+        if code is not None:
+            codes[field] = code
+    if not codes:
+        return record
+    encoded = {key: value for key, value in record.items() if key not in codes}
+    encoded[ENUM_KEY] = codes
+    return encoded
+
+def _decode_enums(record):
+    # Only values under ENUM_KEY are codes; anything stored in the field itself is kept as-is
+    for field, code in record.pop(ENUM_KEY, {}).items():
+        record[field] = ENUM_FIELDS[field][code]
+    for field in ENUM_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            # Values outside the known set stay strings, interned so repeats share one object
+            record[field] = sys.intern(value)
+    return record
+
+def _dumps(record):
+    # Decoded to str: a bytes parameter would be bound as a BLOB, which json()/jsonb() reject
+    return orjson.dumps(_encode_enums(record), default=str).decode()
+
+def _loads(data):
+    return _decode_enums(orjson.loads(data))
+
+def _columns(table):
+    return '(id, project_id, data)' if table in PROJECT_SCOPED_TABLES else '(id, data)'
+
+def _placeholders(table):
+    return f'(?, ?, {DATA_PARAM})' if table in PROJECT_SCOPED_TABLES else f'(?, {DATA_PARAM})'
+
+def _row_params(table, record):
+    if table in PROJECT_SCOPED_TABLES:
+        return (record['id'], record.get('project_id'), _dumps(record))
+    return (record['id'], _dumps(record))
+
+def list_records(table, project_id=None):
+    """List records of a table, optionally only those belonging to a project"""
+    if project_id is None:
+        rows = get_db().execute(f"SELECT json(data) FROM {table} ORDER BY rowid")
+    else:
+        rows = get_db().execute(f"SELECT json(data) FROM {table} WHERE project_id = ? ORDER BY rowid", (project_id,))
+    return [_loads(data) for (data,) in rows]
+
+def list_records_page(table, project_id=None, limit=-1, offset=0):
+    """List a page of records together with the total number of matching records (limit -1 = all)"""
+    where, params = ('WHERE project_id = ?', (project_id,)) if project_id is not None else ('', ())
+    # The total is an uncorrelated subquery, evaluated once from the index in the same statement
+    rows = get_db().execute(
+        f"SELECT json(data), (SELECT COUNT(*) FROM {table} {where}) FROM {table} {where} "
+        f"ORDER BY rowid LIMIT ? OFFSET ?",
+        params + params + (limit, offset)).fetchall()
+    if rows:
+        return [_loads(data) for data, _ in rows], rows[0][1]
+    if offset == 0 and limit != 0:
+        return [], 0
+    # Past the last page (or with limit 0) there is no row to carry the total
+    return [], get_db().execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+
+def get_record(table, record_id):
+    """Get a single record by id, or None if it does not exist"""
+    row = get_db().execute(f"SELECT json(data) FROM {table} WHERE id = ?", (record_id,)).fetchone()
+    return _loads(row[0]) if row else None
+
+def list_projects_with_counts():
+    """List projects with their (files, goals, insights) counts in a single query"""
+    rows = get_db().execute("""
+        SELECT json(p.data), COALESCE(f.n, 0), COALESCE(g.n, 0), COALESCE(i.n, 0)
+        FROM projects p
+        LEFT JOIN (SELECT project_id, COUNT(*) AS n FROM files GROUP BY project_id) f ON f.project_id = p.id
+        LEFT JOIN (SELECT project_id, COUNT(*) AS n FROM goals GROUP BY project_id) g ON g.project_id = p.id
+        LEFT JOIN (SELECT project_id, COUNT(*) AS n FROM insights GROUP BY project_id) i ON i.project_id = p.id
+        ORDER BY p.rowid
+    """)
+    return [(_loads(data), files_count, goals_count, insights_count)
+            for data, files_count, goals_count, insights_count in rows]
+
+def insert_record(table, record):
+    """Insert a new record (caller commits)"""
+    get_db().execute(f"INSERT INTO {table} {_columns(table)} VALUES {_placeholders(table)}",
+                     _row_params(table, record))
+
+def insert_records(table, records):
+    """Insert several new records with one statement (caller commits)"""
+    get_db().executemany(f"INSERT INTO {table} {_columns(table)} VALUES {_placeholders(table)}",
+                         [_row_params(table, record) for record in records])
+
+def update_record(table, record):
+    """Rewrite an existing record (caller commits)"""
+    if table in PROJECT_SCOPED_TABLES:
+        get_db().execute(f"UPDATE {table} SET project_id = ?, data = {DATA_PARAM} WHERE id = ?",
+                         (record.get('project_id'), _dumps(record), record['id']))
+    else:
+        get_db().execute(f"UPDATE {table} SET data = {DATA_PARAM} WHERE id = ?", (_dumps(record), record['id']))
+
+def delete_record(table, record_id):
+    """Delete a record by id (caller commits)"""
+    get_db().execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
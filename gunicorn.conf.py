@@ -0,0 +1,10 @@
+# Production server configuration, picked up by `gunicorn app:app`
+import multiprocessing
+
+bind = '0.0.0.0:5000'
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 4
+
+# Create the schema and import legacy JSON stores once, before forking workers
+preload_app = True
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db
+
+
+class EnumStorageTest(unittest.TestCase):
+    """Stored enum codes must never be confused with values a client sent"""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        # Fresh per-thread connection in the temp data folder, and no background checkpointer
+        self.saved = (db._local, db._checkpointer_pid)
+        db._local = threading.local()
+        db._checkpointer_pid = os.getpid()
+        self.app = Flask(__name__)
+
+    def tearDown(self):
+        conn = getattr(db._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        db._local, db._checkpointer_pid = self.saved
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_imported_int_value_is_not_decoded(self):
+        os.makedirs(db.DATA_FOLDER)
+        with open(os.path.join(db.DATA_FOLDER, 'goals.json'), 'w') as f:
+            json.dump({'g1': {'id': 'g1', 'project_id': 'p1', 'title': 'Legacy', 'priority': 2, 'status': 'active'}}, f)
+
+        db.init_db(self.app)
+        with self.app.app_context():
+            goal = db.get_record('goals', 'g1')
+            self.assertEqual(goal['priority'], 2)
+            self.assertEqual(goal['status'], 'active')
+            self.assertEqual(db.list_records('goals', 'p1'), [goal])
+
+    def test_known_values_round_trip(self):
+        db.init_db(self.app)
+        goal = {'id': 'g2', 'project_id': 'p1', 'priority': 'high', 'status': 0}
+        with self.app.app_context():
+            with db.get_db():
+                db.insert_record('goals', goal)
+            stored = json.loads(db.get_db().execute("SELECT json(data) FROM goals WHERE id = 'g2'").fetchone()[0])
+            self.assertEqual(stored[db.ENUM_KEY], {'priority': 2})
+            self.assertEqual(stored['status'], 0)
+            self.assertEqual(db.get_record('goals', 'g2'), goal)
+
+    def test_reserved_key_is_rejected(self):
+        db.init_db(self.app)
+        with self.app.app_context():
+            with self.assertRaises(ValueError):
+                db.insert_record('goals', {'id': 'g3', 'project_id': 'p1', db.ENUM_KEY: {'status': 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()